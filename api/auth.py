@@ -1,26 +1,51 @@
-from datetime import datetime, timedelta
+import asyncio
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 
+import bcrypt
+from cachetools import LRUCache, TTLCache
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from config import settings
 from database import get_db
 from models import User
 from schemas import EncryptedPayload, Message, PublicKeyResponse, TokenResponse, UserRead
+from utils import jwt
 from utils.crypto import decrypt_payload, export_public_key_pem, load_or_create_key_pair
+from utils.jwt import JWTError
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 token_scheme = HTTPBearer()
+_jwt_key = settings.secret_key.encode()
 
 _private_key = None
 _public_key = None
 
+# Verify results keyed by HMAC(secret, password|hash); failures expire quickly so the cache never
+# stretches the window for online guessing.
+_verify_ok_cache: LRUCache = LRUCache(maxsize=1024)
+_verify_fail_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_verify_cache_lock = threading.Lock()
+
+# bcrypt releases the GIL for the whole key schedule, so a dedicated pool lets concurrent logins use
+# every core without tying up the shared anyio threadpool or the event loop.
+_bcrypt_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
+
+# Cost factor for new hashes; init_bcrypt_rounds() may recalibrate it at startup.
+_bcrypt_rounds = settings.bcrypt_rounds
+_BCRYPT_MIN_ROUNDS = 10
+_BCRYPT_MAX_ROUNDS = 16
+
 
 def get_keys() -> Tuple:
     global _private_key, _public_key
@@ -30,26 +55,80 @@ def get_keys() -> Tuple:
     return _private_key, _public_key
 
 
+def calibrate_bcrypt_rounds(target_ms: float) -> int:
+    """Smallest cost factor (within sane bounds) whose hash time reaches target_ms on this host."""
+    start = time.perf_counter()
+    bcrypt.hashpw(b"x" * 16, bcrypt.gensalt(rounds=_BCRYPT_MIN_ROUNDS))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    # each extra round doubles the work
+    rounds = _BCRYPT_MIN_ROUNDS
+    while rounds < _BCRYPT_MAX_ROUNDS and elapsed_ms * 2 ** (rounds - _BCRYPT_MIN_ROUNDS) < target_ms:
+        rounds += 1
+    return rounds
+
+
+def init_bcrypt_rounds() -> int:
+    global _bcrypt_rounds
+    if settings.bcrypt_target_ms:
+        _bcrypt_rounds = calibrate_bcrypt_rounds(settings.bcrypt_target_ms)
+    return _bcrypt_rounds
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=_bcrypt_rounds)).decode()
+
+
+def _check_password(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:
+        # malformed stored hash: fail the login rather than crash it
+        return False
+
+
+def _verify_cache_key(password: str, hashed: str) -> bytes:
+    message = password.encode() + b"|" + hashed.encode()
+    return hmac.new(settings.secret_key.encode(), message, "sha256").digest()
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    if not settings.password_verify_cache:
+        return _check_password(password, hashed)
+
+    key = _verify_cache_key(password, hashed)
+    with _verify_cache_lock:
+        if key in _verify_ok_cache:
+            return True
+        if key in _verify_fail_cache:
+            return False
+
+    ok = _check_password(password, hashed)
+    with _verify_cache_lock:
+        if ok:
+            _verify_ok_cache[key] = True
+        else:
+            _verify_fail_cache[key] = True
+    return ok
+
+
+async def _run_bcrypt(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor, func, *args)
 
 
 def create_access_token(data: dict) -> str:
-    expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+    expire = int(time.time()) + settings.access_token_expire_minutes * 60
     to_encode = {**data, "exp": expire}
-    return jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
+    return jwt.encode(to_encode, _jwt_key)
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(token_scheme), db: Session = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        payload = jwt.decode(token, _jwt_key)
         sub = payload.get("sub")
     except JWTError as exc:
         raise HTTPException(
@@ -65,7 +144,8 @@ def get_current_user(
     except (TypeError, ValueError) as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload") from exc
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # pool checkout and the query block, so they run on a worker thread like the login/register DB calls
+    user = await asyncio.to_thread(db.get, User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     if not user.is_active:
@@ -79,11 +159,39 @@ def fetch_public_key():
     return PublicKeyResponse(public_key=export_public_key_pem(public_key))
 
 
-@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(payload: EncryptedPayload, db: Session = Depends(get_db)):
+# register/login stay async so bcrypt can use its own executor; the RSA decrypt and the blocking
+# PyMySQL calls below are pushed to worker threads so they never stall the event loop (and SSE streams)
+def _decrypt_request(ciphertext: str) -> dict:
     private_key, _ = get_keys()
+    return decrypt_payload(ciphertext, private_key)
+
+
+def _find_registration_conflicts(db: Session, username: str, email: str | None):
+    # one round-trip for both uniqueness checks
+    conflict = User.username == username
+    if email:
+        conflict = or_(conflict, User.email == email)
+    return db.query(User.username, User.email).filter(conflict).all()
+
+
+def _insert_user(db: Session, user: User) -> None:
+    db.add(user)
     try:
-        decrypted = decrypt_payload(payload.payload, private_key)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    db.refresh(user)
+
+
+def _get_user_by_username(db: Session, username: str) -> User | None:
+    return db.query(User).filter(User.username == username).first()
+
+
+@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+async def register(payload: EncryptedPayload, db: Session = Depends(get_db)):
+    try:
+        decrypted = await asyncio.to_thread(_decrypt_request, payload.payload)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无法解密请求数据") from exc
 
@@ -95,32 +203,37 @@ def register(payload: EncryptedPayload, db: Session = Depends(get_db)):
     if not username or not password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="用户名和密码不能为空")
 
-    existing_user = db.query(User).filter(User.username == username).first()
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="用户名已被注册")
-
-    if email:
-        existing_email = db.query(User).filter(User.email == email).first()
-        if existing_email:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="邮箱已被注册")
+    existing = await asyncio.to_thread(_find_registration_conflicts, db, username, email)
+    if existing:
+        # the SQL match follows the column collation (case-insensitive on MySQL), so compare emails the
+        # same way; a row that isn't an email match can only have matched on username
+        folded_email = email.casefold() if email else None
+        username_taken = any(
+            not (row.email and row.email.casefold() == folded_email) or row.username.casefold() == username.casefold()
+            for row in existing
+        )
+        if username_taken:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="用户名已被注册")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="邮箱已被注册")
 
     user = User(
         username=username,
         email=email,
         full_name=full_name,
-        password_hash=get_password_hash(password),
+        password_hash=await _run_bcrypt(get_password_hash, password),
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return UserRead.from_orm(user)
+    try:
+        await asyncio.to_thread(_insert_user, db, user)
+    except IntegrityError:
+        # a concurrent registration took the username/email after the check above
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="用户名或邮箱已被注册")
+    return UserRead.model_validate(user)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: EncryptedPayload, db: Session = Depends(get_db)):
-    private_key, _ = get_keys()
+async def login(payload: EncryptedPayload, db: Session = Depends(get_db)):
     try:
-        decrypted = decrypt_payload(payload.payload, private_key)
+        decrypted = await asyncio.to_thread(_decrypt_request, payload.payload)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无法解密请求数据") from exc
 
@@ -130,19 +243,19 @@ def login(payload: EncryptedPayload, db: Session = Depends(get_db)):
     if not username or not password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="用户名和密码不能为空")
 
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.password_hash):
+    user = await asyncio.to_thread(_get_user_by_username, db, username)
+    if not user or not await _run_bcrypt(verify_password, password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户名或密码错误")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="用户已被禁用")
 
     token = create_access_token({"sub": f"{user.id}"})
-    return TokenResponse(access_token=token, user=UserRead.from_orm(user))
+    return TokenResponse(access_token=token, user=UserRead.model_validate(user))
 
 
 @router.get("/me", response_model=UserRead)
 def me(current_user: User = Depends(get_current_user)):
-    return UserRead.from_orm(current_user)
+    return UserRead.model_validate(current_user)
 
 
 @router.post("/logout", response_model=Message)
@@ -1,7 +1,5 @@
-from fastapi import APIRouter, Depends, File, Form, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, File, Form, UploadFile
 
-from database import get_db
 from schemas import ChatMessage, Message
 from api.chat.services.agent_chat import AgentPayload, handle_agent_chat
 from api.chat.services.rag_chat import ChatPayload as RagPayload, handle_rag_chat
@@ -9,16 +7,19 @@ from api.chat.services.simple_chat import handle_simple_chat
 
 router = APIRouter(prefix="/api/chat", tags=["Chat"])
 
+# The chat handlers do not touch the database yet, so no route depends on get_db: a sync generator
+# dependency would cost each streaming request a threadpool round-trip to open and close a session.
+
 
 @router.post("/stream/rag")
-async def chat_rag(body: RagPayload, db: Session = Depends(get_db)):
-    return await handle_rag_chat(body, db)
+async def chat_rag(body: RagPayload):
+    return await handle_rag_chat(body)
 
 
 @router.post("/stream/simple")
-async def chat_simple(body: ChatMessage, db: Session = Depends(get_db)):
+async def chat_simple(body: ChatMessage):
     # Deprecated JSON payload route retained for compatibility; forwards to simple_chat handler.
-    return await handle_simple_chat(body.content, [], None, db)
+    return await handle_simple_chat(body.content, [], None)
 
 
 @router.post("/simple_chat")
@@ -26,14 +27,13 @@ async def simple_chat(
     prompt: str = Form(..., description="用户输入的文本"),
     model: str | None = Form(None, description="大模型名称"),
     files: list[UploadFile] | None = File(default=None, description="可选上传文件"),
-    db: Session = Depends(get_db),
 ):
-    return await handle_simple_chat(prompt, files or [], model, db)
+    return await handle_simple_chat(prompt, files or [], model)
 
 
 @router.post("/stream/agent")
-async def chat_agent(body: AgentPayload, db: Session = Depends(get_db)):
-    return await handle_agent_chat(body, db)
+async def chat_agent(body: AgentPayload):
+    return await handle_agent_chat(body)
 
 
 @router.get("/health", response_model=Message)
@@ -8,7 +8,7 @@ class AgentPayload(ChatMessage):
     tool: str | None = None
 
 
-async def handle_agent_chat(body: AgentPayload, _db):
+async def handle_agent_chat(body: AgentPayload, _db=None):
     if not body.content:
         raise HTTPException(status_code=400, detail="prompt required")
 
@@ -12,7 +12,7 @@ class ChatPayload(ChatRequest):
     kb_ids: Optional[List[str]] = None
 
 
-async def handle_rag_chat(body: ChatPayload, db: Session):
+async def handle_rag_chat(body: ChatPayload, db: Optional[Session] = None):
     # TODO: replace with real RAG pipeline; placeholder to keep contract similar to legacy.
     if not body.messages:
         raise HTTPException(status_code=400, detail="messages is required")
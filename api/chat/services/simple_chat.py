@@ -1,11 +1,10 @@
 import asyncio
-import json
 import os
 import uuid
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import aiofiles
+import httpx
+import orjson
 from fastapi import HTTPException, UploadFile
 from openai import AsyncOpenAI
 from qcloud_cos import CosConfig, CosS3Client
@@ -14,15 +13,45 @@ from sse_starlette.sse import EventSourceResponse
 
 DEFAULT_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
+# SSE payloads are JSON objects; only the streamed text varies, so the rest is pre-serialized.
+_MESSAGE_EVENT_PREFIX = '{"event":"message","data":'
+_DONE_EVENT = orjson.dumps({"event": "done", "data": "[DONE]"}).decode()
+
+
+# Process-wide clients, built on first use so their connection pools are shared across requests.
+_cos_client: Optional[CosS3Client] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
 
 def get_cos_client():
+    global _cos_client
+    if _cos_client is not None:
+        return _cos_client
     secret_id = os.environ.get("COS_SECRET_ID")
     secret_key = os.environ.get("COS_SECRET_KEY")
     region = os.environ.get("COS_REGION", "ap-nanjing")
     if not secret_id or not secret_key:
         raise HTTPException(status_code=500, detail="COS 密钥未配置")
     config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=None)
-    return CosS3Client(config)
+    _cos_client = CosS3Client(config)
+    return _cos_client
+
+
+def get_openai_client() -> AsyncOpenAI:
+    global _openai_client
+    if _openai_client is not None:
+        return _openai_client
+    api_key = os.environ.get("OPENAI_API_KEY")
+    base_url = os.environ.get("OPENAI_BASE_URL")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY 未配置")
+    # one keep-alive pool for every chat request, sized for many concurrent streams
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        timeout=httpx.Timeout(60.0),
+    )
+    _openai_client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+    return _openai_client
 
 
 COS_BUCKET = os.environ.get("COS_BUCKET", "extraction-1311618546")
@@ -32,51 +61,46 @@ COS_BASE_URL = os.environ.get(
 )
 
 
-async def upload_files_to_cos(upload_files: List[UploadFile]) -> List[Dict[str, Any]]:
-    if not upload_files:
-        return []
-
-    client = get_cos_client()
-    tmp_dir = Path("tmp_uploads")
-    tmp_dir.mkdir(exist_ok=True)
-    uploaded: List[Dict[str, Any]] = []
+COS_UPLOAD_CONCURRENCY = 8
 
-    for upload_file in upload_files:
-        if not getattr(upload_file, "filename", None):
-            continue
-        suffix = Path(upload_file.filename).suffix or ""
-        union_id = f"{uuid.uuid4()}{suffix}"
-        tmp_path = tmp_dir / union_id
 
-        content = await upload_file.read()
-        async with aiofiles.open(tmp_path, "wb") as f:
-            await f.write(content)
+async def _upload_one_to_cos(client, upload_file: UploadFile, limiter: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    if not getattr(upload_file, "filename", None):
+        return None
+    suffix = os.path.splitext(upload_file.filename)[1]
+    union_id = f"{uuid.uuid4()}{suffix}"
 
+    async with limiter:
         try:
+            # stream the spooled upload straight to COS; no in-memory copy or local temp file
             await asyncio.to_thread(
-                client.upload_file,
+                client.put_object,
                 Bucket=COS_BUCKET,
+                Body=upload_file.file,
                 Key=union_id,
-                LocalFilePath=str(tmp_path),
             )
         except (CosServiceError, CosClientError) as exc:
             raise HTTPException(status_code=500, detail=f"文件上传失败: {str(exc)}")
-        finally:
-            try:
-                tmp_path.unlink(missing_ok=True)
-            except FileNotFoundError:
-                pass
-
-        file_url = f"{COS_BASE_URL.rstrip('/')}/{union_id}"
-        uploaded.append(
-            {
-                "union_id": union_id,
-                "file_url": file_url,
-                "original_name": upload_file.filename,
-                "content_type": upload_file.content_type,
-            }
-        )
-    return uploaded
+
+    file_url = f"{COS_BASE_URL.rstrip('/')}/{union_id}"
+    return {
+        "union_id": union_id,
+        "file_url": file_url,
+        "original_name": upload_file.filename,
+        "content_type": upload_file.content_type,
+    }
+
+
+async def upload_files_to_cos(upload_files: List[UploadFile]) -> List[Dict[str, Any]]:
+    if not upload_files:
+        return []
+
+    client = get_cos_client()
+
+    # upload files concurrently; the semaphore caps simultaneous COS connections
+    limiter = asyncio.Semaphore(COS_UPLOAD_CONCURRENCY)
+    results = await asyncio.gather(*(_upload_one_to_cos(client, upload_file, limiter) for upload_file in upload_files))
+    return [item for item in results if item is not None]
 
 
 def build_message_content(text: str, uploads: Optional[List[Dict[str, Any]]]) -> Any:
@@ -90,29 +114,32 @@ def build_message_content(text: str, uploads: Optional[List[Dict[str, Any]]]) ->
         url = item.get("file_url")
         if not url:
             continue
-        content_type = (item.get("content_type") or "").lower()
-        if content_type.startswith("image/"):
+        content_type = item.get("content_type")
+        if content_type and content_type[:6].lower() == "image/":
             image_parts.append({"type": "image_url", "image_url": {"url": url}})
         else:
             link_lines.append(f"- {item.get('original_name') or '附件'}: {url}")
 
-    link_text = "\n\n附件链接：\n" + "\n".join(link_lines) if link_lines else ""
+    # assemble the text in a single join rather than chained concatenations
+    combined = "".join((text, "\n\n附件链接：\n", "\n".join(link_lines))) if link_lines else text
     if image_parts:
-        return [{"type": "text", "text": text + link_text}, *image_parts]
-    return text + link_text
+        return [{"type": "text", "text": combined}, *image_parts]
+    return combined
 
 
 def flatten_delta_content(delta: Any) -> str:
+    # Called once per streamed chunk; plain str deltas are by far the common case, so test for them
+    # first with an exact type check.
+    if delta.__class__ is str:
+        return delta
     if delta is None:
         return ""
     if isinstance(delta, str):
         return delta
     if isinstance(delta, list):
-        parts = []
-        for item in delta:
-            if isinstance(item, dict) and item.get("type") == "text":
-                parts.append(item.get("text", ""))
-        return "".join(parts)
+        return "".join(
+            item.get("text", "") for item in delta if isinstance(item, dict) and item.get("type") == "text"
+        )
     return str(delta)
 
 
@@ -120,15 +147,11 @@ async def handle_simple_chat(prompt: str, upload_files: List[UploadFile], model:
     if not prompt:
         raise HTTPException(status_code=400, detail="prompt required")
 
-    api_key = os.environ.get("OPENAI_API_KEY")
-    base_url = os.environ.get("OPENAI_BASE_URL")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="OPENAI_API_KEY 未配置")
+    client = get_openai_client()
 
     uploaded = await upload_files_to_cos(upload_files)
     user_message = {"role": "user", "content": build_message_content(prompt, uploaded)}
 
-    client = AsyncOpenAI(api_key=api_key, base_url=base_url)
     completion = await client.chat.completions.create(
         model=model or DEFAULT_MODEL,
         messages=[
@@ -145,14 +168,12 @@ async def handle_simple_chat(prompt: str, upload_files: List[UploadFile], model:
                     delta = chunk.choices[0].delta.content
                     text = flatten_delta_content(delta)
                     if text:
-                        payload = {"event": "message", "data": text}
-                        yield json.dumps(payload, ensure_ascii=False)
+                        yield _MESSAGE_EVENT_PREFIX + orjson.dumps(text).decode() + "}"
         except Exception as exc:
             payload = {"event": "error", "data": str(exc)}
-            yield json.dumps(payload, ensure_ascii=False)
+            yield orjson.dumps(payload).decode()
         finally:
-            payload = {"event": "done", "data": "[DONE]"}
-            yield json.dumps(payload, ensure_ascii=False)
+            yield _DONE_EVENT
 
     return EventSourceResponse(
         event_gen(),
@@ -1,54 +1,192 @@
+import asyncio
 import hashlib
-import uuid
+import logging
+import os
+import threading
+from collections import defaultdict, deque
 from pathlib import Path
-from typing import Optional
+from stat import S_ISREG
+from typing import BinaryIO, Optional
 
-import aiofiles
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from fastapi.responses import FileResponse
+from cachetools import LRUCache
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import literal, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
-
-from ..config import settings
-from ..database import get_db
-from ..models import FileObject, Folder, User
-from ..schemas import FileRead, FileUpdate, FolderChildren, FolderCreate, FolderRead, FolderUpdate
-from .auth import get_current_user
+from sqlalchemy.orm import Session, aliased, load_only, raiseload
+
+from config import settings
+from database import get_db
+from models import FileObject, Folder, User
+from schemas import (
+    FileListAdapter,
+    FileRead,
+    FileUpdate,
+    FolderChildren,
+    FolderCreate,
+    FolderListAdapter,
+    FolderRead,
+    FolderUpdate,
+)
+from api.auth import get_current_user
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/fs", tags=["FileSystem"])
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# nesting limit enforced when folders are created or moved; it also bounds the recursive folder queries
+# below MySQL's default cte_max_recursion_depth (1000)
+MAX_FOLDER_DEPTH = 999
+
+# Listings load only the columns FolderRead/FileRead serialize and never touch relationships, so the
+# joined owner/parent/folder loads are switched off (and any accidental lazy load raises).
+_FOLDER_LISTING_OPTIONS = (
+    load_only(Folder.id, Folder.owner_id, Folder.parent_id, Folder.name, Folder.created_at, Folder.updated_at),
+    raiseload("*"),
+)
+_FILE_LISTING_OPTIONS = (
+    load_only(
+        FileObject.id,
+        FileObject.owner_id,
+        FileObject.folder_id,
+        FileObject.name,
+        FileObject.mime_type,
+        FileObject.size,
+        FileObject.sha256,
+        FileObject.created_at,
+        FileObject.updated_at,
+    ),
+    raiseload("*"),
+)
+
+
+# (owner_id, folder_id) -> storage path parts for uploads into that folder. Cleared whenever a folder
+# is moved or deleted, since either changes or invalidates cached chains.
+_folder_parts_cache: LRUCache = LRUCache(maxsize=8192)
+_folder_parts_lock = threading.Lock()
+
+# pre-generated random storage file names, see _next_storage_name
+_NAME_POOL: deque[str] = deque()
+_NAME_POOL_BATCH = 256
+
+# storage directories already created by this process
+_DIR_EXISTS: set[str] = set()
+_DIR_LOCK = threading.Lock()
+
+
+class _DownloadResponse(FileResponse):
+    # When the ASGI server offers the "http.response.pathsend" extension Starlette hands it the path
+    # and the server does the zero-copy transfer itself; otherwise the file is streamed in 1 MiB
+    # reads rather than 64 KiB ones, cutting thread hops and send() calls per download 16-fold.
+    chunk_size = 1024 * 1024
+
+
+def _storage_abs_path(storage_path: str) -> Path:
+    # storage_root is resolved by Settings; stored paths are built from ids and uuids, so plain joins
+    # stay inside the root
+    return settings.storage_root / storage_path
+
+
+def _ensure_dir(path: Path) -> None:
+    # storage directories are never removed by the app, so each one only needs creating once per process
+    key = str(path)
+    if key in _DIR_EXISTS:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    with _DIR_LOCK:
+        _DIR_EXISTS.add(key)
+
+
+def _forget_dir(path: Path) -> None:
+    with _DIR_LOCK:
+        _DIR_EXISTS.discard(str(path))
 
-def _ensure_storage_root() -> Path:
-    root = Path(settings.storage_root)
-    root.mkdir(parents=True, exist_ok=True)
-    return root
+
+def _next_storage_name() -> str:
+    # 128 random bits as hex, same shape as uuid4().hex; refilled from one urandom call per batch.
+    # deque.popleft is atomic, so concurrent callers at worst both refill the pool.
+    try:
+        return _NAME_POOL.popleft()
+    except IndexError:
+        raw = os.urandom(16 * _NAME_POOL_BATCH)
+        _NAME_POOL.extend(raw[i : i + 16].hex() for i in range(16, len(raw), 16))
+        return raw[:16].hex()
 
 
-def _folder_path_parts(db: Session, owner_id: int, folder_id: Optional[int]) -> list[str]:
+def _save_upload(src: BinaryIO, dest: Path) -> tuple[int, str]:
+    """
+    Copy an upload to dest with plain blocking I/O, hashing as it goes. Runs on a worker thread;
+    both the write and hashlib's update release the GIL for large buffers.
+    Returns (size, sha256 hex digest).
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    buf = memoryview(bytearray(UPLOAD_CHUNK_SIZE))
+    with open(dest, "wb") as f:
+        while n := src.readinto(buf):
+            chunk = buf[:n]
+            f.write(chunk)
+            hasher.update(chunk)
+            size += n
+    return size, hasher.hexdigest()
+
+
+def _folder_ancestor_ids(db: Session, owner_id: int, folder_id: int) -> list[int]:
+    """
+    Ids from folder_id up to its top-level ancestor, fetched with one recursive query.
+    Returns an empty list if the folder does not exist for this owner.
+    """
+    ancestors = (
+        select(Folder.id, Folder.parent_id, literal(0).label("depth"))
+        .where(Folder.id == folder_id, Folder.owner_id == owner_id)
+        .cte("ancestors", recursive=True)
+    )
+    parent = aliased(Folder)
+    ancestors = ancestors.union_all(
+        select(parent.id, parent.parent_id, ancestors.c.depth + 1)
+        .join(ancestors, parent.id == ancestors.c.parent_id)
+        .where(parent.owner_id == owner_id, ancestors.c.depth < MAX_FOLDER_DEPTH)
+    )
+    chain = list(db.execute(select(ancestors.c.id).order_by(ancestors.c.depth)).scalars())
+    # the depth bound stops a cyclic parent chain, which shows up as repeated ids; a chain cut off at the
+    # bound can only come from a tree nested past MAX_FOLDER_DEPTH outside this API
+    if len(chain) > MAX_FOLDER_DEPTH or len(set(chain)) != len(chain):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件夹结构异常")
+    return chain
+
+
+def _folder_path_parts(db: Session, owner_id: int, folder_id: Optional[int]) -> tuple[str, ...]:
     # Build safe path parts: /<owner_id>/<folder_id-chain>/  (no user-controlled names)
-    parts = [str(owner_id)]
     if folder_id is None:
-        return parts
-
-    seen: set[int] = set()
-    cur = db.query(Folder).filter(Folder.id == folder_id, Folder.owner_id == owner_id).first()
-    if not cur:
+        return (str(owner_id),)
+
+    key = (owner_id, folder_id)
+    with _folder_parts_lock:
+        parts = _folder_parts_cache.get(key)
+    if parts is not None:
+        # the cache is per process, so the folder may have been deleted by another worker since
+        exists = db.query(Folder.id).filter(Folder.id == folder_id, Folder.owner_id == owner_id).first()
+        if exists:
+            return parts
+        with _folder_parts_lock:
+            _folder_parts_cache.pop(key, None)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件夹不存在")
 
-    chain: list[int] = []
-    while cur is not None:
-        if cur.id in seen:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件夹结构异常")
-        seen.add(cur.id)
-        chain.append(cur.id)
-        if cur.parent_id is None:
-            break
-        cur = db.query(Folder).filter(Folder.id == cur.parent_id, Folder.owner_id == owner_id).first()
-    chain.reverse()
-    parts.extend([str(x) for x in chain])
+    chain = _folder_ancestor_ids(db, owner_id, folder_id)
+    if not chain:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件夹不存在")
+    parts = (str(owner_id), *[str(x) for x in reversed(chain)])
+    with _folder_parts_lock:
+        _folder_parts_cache[key] = parts
     return parts
 
 
+def _invalidate_folder_parts() -> None:
+    with _folder_parts_lock:
+        _folder_parts_cache.clear()
+
+
 def _get_folder_owned(db: Session, owner_id: int, folder_id: int) -> Folder:
     folder = db.query(Folder).filter(Folder.id == folder_id, Folder.owner_id == owner_id).first()
     if not folder:
@@ -70,50 +208,118 @@ def _assert_folder_move_ok(db: Session, owner_id: int, folder_id: int, new_paren
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不能移动到自身")
 
     # Ensure new_parent exists and not in folder's descendants
-    cur = _get_folder_owned(db, owner_id, new_parent_id)
-    seen: set[int] = set()
-    while cur is not None and cur.parent_id is not None:
-        if cur.id in seen:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件夹结构异常")
-        seen.add(cur.id)
-        if cur.parent_id == folder_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不能移动到子文件夹内")
-        cur = db.query(Folder).filter(Folder.id == cur.parent_id, Folder.owner_id == owner_id).first()
+    ancestors = _folder_ancestor_ids(db, owner_id, new_parent_id)
+    if not ancestors:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件夹不存在")
+    if folder_id in ancestors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不能移动到子文件夹内")
+    if len(ancestors) + len(_folder_subtree_levels(db, owner_id, folder_id)) > MAX_FOLDER_DEPTH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件夹层级过深")
 
 
 def _safe_unlink(path: Path) -> None:
     try:
-        if path.exists():
-            path.unlink()
-    except Exception:
+        path.unlink(missing_ok=True)
+    except Exception:  # noqa: BLE001
         # ignore disk deletion errors to avoid blocking DB cleanup
-        pass
+        logger.warning("Failed to remove stored file %s", path, exc_info=True)
 
 
-def _delete_folder_recursive(db: Session, owner_id: int, folder_id: int) -> int:
+# dir_fd-relative unlink is POSIX-only; elsewhere _unlink_all falls back to one unlink per path
+_UNLINK_DIR_FD = os.unlink in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+
+def _unlink_all(paths: list[Path]) -> None:
+    if not _UNLINK_DIR_FD:
+        for path in paths:
+            _safe_unlink(path)
+        return
+
+    # subtree deletes put many files in few directories: open each directory once and unlink by name
+    # relative to it, so the kernel resolves the directory path once instead of once per file
+    by_dir: dict[Path, list[str]] = defaultdict(list)
+    for path in paths:
+        by_dir[path.parent].append(path.name)
+
+    for directory, names in by_dir.items():
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            logger.warning("Failed to open storage directory %s", directory, exc_info=True)
+            continue
+        try:
+            for name in names:
+                try:
+                    os.unlink(name, dir_fd=dir_fd)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    # ignore disk deletion errors to avoid blocking DB cleanup
+                    logger.warning("Failed to remove stored file %s", directory / name, exc_info=True)
+        finally:
+            os.close(dir_fd)
+
+
+def _folder_subtree_levels(db: Session, owner_id: int, folder_id: int) -> list[list[int]]:
     """
-    Recursively delete a folder and all its descendants (folders + files).
-    Returns number of deleted DB rows (approx).
+    Ids of folder_id and all its descendants grouped by depth (index 0 is folder_id itself),
+    fetched with one recursive query. Returns an empty list if the folder does not exist.
     """
-    deleted = 0
+    subtree = (
+        select(Folder.id, literal(0).label("depth"))
+        .where(Folder.id == folder_id, Folder.owner_id == owner_id)
+        .cte("subtree", recursive=True)
+    )
+    child = aliased(Folder)
+    subtree = subtree.union_all(
+        select(child.id, subtree.c.depth + 1)
+        .join(subtree, child.parent_id == subtree.c.id)
+        .where(child.owner_id == owner_id, subtree.c.depth < MAX_FOLDER_DEPTH)
+    )
+    levels: list[list[int]] = []
+    seen: set[int] = set()
+    # the depth bound only stops runaway recursion; a cycle shows up as a repeated id
+    for fid, depth in db.execute(select(subtree.c.id, subtree.c.depth)):
+        if fid in seen:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件夹结构异常")
+        seen.add(fid)
+        while len(levels) <= depth:
+            levels.append([])
+        levels[depth].append(fid)
+    return levels
 
-    # delete files in this folder
-    files = db.query(FileObject).filter(FileObject.owner_id == owner_id, FileObject.folder_id == folder_id).all()
-    for f in files:
-        abs_path = (Path(settings.storage_root) / f.storage_path).resolve()
-        _safe_unlink(abs_path)
-        db.delete(f)
-        deleted += 1
 
-    # recurse into subfolders
-    subfolders = db.query(Folder).filter(Folder.owner_id == owner_id, Folder.parent_id == folder_id).all()
-    for sf in subfolders:
-        deleted += _delete_folder_recursive(db, owner_id, sf.id)
+def _delete_folder_recursive(db: Session, owner_id: int, folder_id: int) -> tuple[int, list[Path]]:
+    """
+    Delete a folder and all its descendants (folders + files) with bulk statements.
+    Returns number of deleted DB rows and the on-disk paths of the deleted files; unlinking them is
+    left to the caller so it can happen after commit, off the request path.
+    """
+    levels = _folder_subtree_levels(db, owner_id, folder_id)
+    if not levels:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件夹不存在")
+    folder_ids = [fid for level in levels for fid in level]
 
-    folder = _get_folder_owned(db, owner_id, folder_id)
-    db.delete(folder)
-    deleted += 1
-    return deleted
+    storage_paths = db.execute(
+        select(FileObject.storage_path).where(FileObject.owner_id == owner_id, FileObject.folder_id.in_(folder_ids))
+    ).scalars()
+    abs_paths = [_storage_abs_path(storage_path) for storage_path in storage_paths]
+
+    deleted = (
+        db.query(FileObject)
+        .filter(FileObject.owner_id == owner_id, FileObject.folder_id.in_(folder_ids))
+        .delete(synchronize_session=False)
+    )
+    # deepest level first, so no row still has children when deleted and FK cascades never fire
+    for level in reversed(levels):
+        deleted += (
+            db.query(Folder)
+            .filter(Folder.owner_id == owner_id, Folder.id.in_(level))
+            .delete(synchronize_session=False)
+        )
+    return deleted, abs_paths
 
 
 @router.post("/folders", response_model=FolderRead, status_code=status.HTTP_201_CREATED)
@@ -124,9 +330,11 @@ def create_folder(
 ):
     parent_id = body.parent_id
     if parent_id is not None:
-        parent = db.query(Folder).filter(Folder.id == parent_id, Folder.owner_id == current_user.id).first()
-        if not parent:
+        ancestors = _folder_ancestor_ids(db, current_user.id, parent_id)
+        if not ancestors:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="父文件夹不存在")
+        if len(ancestors) >= MAX_FOLDER_DEPTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="文件夹层级过深")
 
     folder = Folder(owner_id=current_user.id, parent_id=parent_id, name=body.name)
     db.add(folder)
@@ -136,7 +344,7 @@ def create_folder(
         db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="同级目录下已存在同名文件夹")
     db.refresh(folder)
-    return FolderRead.from_orm(folder)
+    return FolderRead.model_validate(folder)
 
 
 @router.get("/folders/{folder_id}", response_model=FolderRead)
@@ -148,7 +356,7 @@ def get_folder(
     folder = db.query(Folder).filter(Folder.id == folder_id, Folder.owner_id == current_user.id).first()
     if not folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件夹不存在")
-    return FolderRead.from_orm(folder)
+    return FolderRead.model_validate(folder)
 
 
 @router.patch("/folders/{folder_id}", response_model=FolderRead)
@@ -168,10 +376,11 @@ def update_folder(
 
     if "parent_id" in body.model_fields_set:
         new_parent_id = body.parent_id
-        if new_parent_id is not None:
-            _get_folder_owned(db, current_user.id, new_parent_id)
         _assert_folder_move_ok(db, current_user.id, folder_id, new_parent_id)
+        moved = folder.parent_id != new_parent_id
         folder.parent_id = new_parent_id
+    else:
+        moved = False
 
     # rename
     if body.name is not None:
@@ -182,20 +391,22 @@ def update_folder(
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="同级目录下已存在同名文件夹")
+    if moved:
+        _invalidate_folder_parts()
     db.refresh(folder)
-    return FolderRead.from_orm(folder)
+    return FolderRead.model_validate(folder)
 
 
 @router.delete("/folders/{folder_id}")
 def delete_folder(
     folder_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     # recursive cleanup to avoid relying on DB cascade settings
-    _ensure_storage_root()
     try:
-        deleted = _delete_folder_recursive(db, current_user.id, folder_id)
+        deleted, abs_paths = _delete_folder_recursive(db, current_user.id, folder_id)
         db.commit()
     except HTTPException:
         db.rollback()
@@ -203,35 +414,47 @@ def delete_folder(
     except Exception as exc:  # noqa: BLE001
         db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="删除失败") from exc
+    _invalidate_folder_parts()
+    # disk cleanup runs after the response is sent
+    background_tasks.add_task(_unlink_all, abs_paths)
     return {"deleted": deleted}
 
 
+def _children_response(folders: list[Folder], files: list[FileObject]) -> Response:
+    # rows are validated once and dumped straight to JSON bytes by pydantic-core; returning a Response
+    # skips FastAPI's second validation pass, the to-dict serialization and the json.dumps render
+    body = FolderChildren.model_construct(
+        folders=FolderListAdapter.validate_python(folders, from_attributes=True),
+        files=FileListAdapter.validate_python(files, from_attributes=True),
+    )
+    return Response(content=body.model_dump_json(), media_type="application/json")
+
+
 @router.get("/folders/{folder_id}/children", response_model=FolderChildren)
 def list_children(
     folder_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    folder = db.query(Folder).filter(Folder.id == folder_id, Folder.owner_id == current_user.id).first()
-    if not folder:
+    exists = db.query(Folder.id).filter(Folder.id == folder_id, Folder.owner_id == current_user.id).first()
+    if not exists:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件夹不存在")
 
     folders = (
         db.query(Folder)
+        .options(*_FOLDER_LISTING_OPTIONS)
         .filter(Folder.owner_id == current_user.id, Folder.parent_id == folder_id)
         .order_by(Folder.created_at.desc())
         .all()
     )
     files = (
         db.query(FileObject)
+        .options(*_FILE_LISTING_OPTIONS)
         .filter(FileObject.owner_id == current_user.id, FileObject.folder_id == folder_id)
         .order_by(FileObject.created_at.desc())
         .all()
     )
-    return FolderChildren(
-        folders=[FolderRead.from_orm(x) for x in folders],
-        files=[FileRead.from_orm(x) for x in files],
-    )
+    return _children_response(folders, files)
 
 
 @router.get("/root/children", response_model=FolderChildren)
@@ -241,20 +464,19 @@ def list_root_children(
 ):
     folders = (
         db.query(Folder)
+        .options(*_FOLDER_LISTING_OPTIONS)
         .filter(Folder.owner_id == current_user.id, Folder.parent_id.is_(None))
         .order_by(Folder.created_at.desc())
         .all()
     )
     files = (
         db.query(FileObject)
+        .options(*_FILE_LISTING_OPTIONS)
         .filter(FileObject.owner_id == current_user.id, FileObject.folder_id.is_(None))
         .order_by(FileObject.created_at.desc())
         .all()
     )
-    return FolderChildren(
-        folders=[FolderRead.from_orm(x) for x in folders],
-        files=[FileRead.from_orm(x) for x in files],
-    )
+    return _children_response(folders, files)
 
 
 @router.post("/files", response_model=FileRead, status_code=status.HTTP_201_CREATED)
@@ -264,31 +486,23 @@ async def upload_file(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    _ensure_storage_root()
     parts = _folder_path_parts(db, current_user.id, folder_id)
 
     # store as: <STORAGE_ROOT>/<owner>/<folder-chain>/<uuid>
     storage_rel_dir = Path(*parts)
-    storage_dir = Path(settings.storage_root) / storage_rel_dir
-    storage_dir.mkdir(parents=True, exist_ok=True)
+    storage_dir = settings.storage_root / storage_rel_dir
+    _ensure_dir(storage_dir)
 
-    storage_name = uuid.uuid4().hex
+    storage_name = _next_storage_name()
     storage_rel_path = (storage_rel_dir / storage_name).as_posix()
-    storage_abs_path = (Path(settings.storage_root) / storage_rel_dir / storage_name).resolve()
-
-    hasher = hashlib.sha256()
-    size = 0
+    storage_abs_path = _storage_abs_path(storage_rel_path)
 
     try:
-        async with aiofiles.open(storage_abs_path, "wb") as f:
-            while True:
-                chunk = await file.read(1024 * 1024)
-                if not chunk:
-                    break
-                size += len(chunk)
-                hasher.update(chunk)
-                await f.write(chunk)
+        size, sha256 = await asyncio.to_thread(_save_upload, file.file, storage_abs_path)
     except Exception as exc:  # noqa: BLE001
+        if isinstance(exc, FileNotFoundError):
+            # directory removed outside the app; recreate it on the next upload
+            _forget_dir(storage_dir)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="保存文件失败") from exc
     finally:
         await file.close()
@@ -299,7 +513,7 @@ async def upload_file(
         name=file.filename or "unnamed",
         mime_type=file.content_type,
         size=size,
-        sha256=hasher.hexdigest(),
+        sha256=sha256,
         storage_path=storage_rel_path,
     )
     db.add(obj)
@@ -307,10 +521,15 @@ async def upload_file(
         db.commit()
     except IntegrityError:
         db.rollback()
+        _safe_unlink(storage_abs_path)
         # allow same file name? currently unique constraint; if conflict, return 409
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="同一目录下已存在同名文件")
+    except Exception:
+        db.rollback()
+        _safe_unlink(storage_abs_path)
+        raise
     db.refresh(obj)
-    return FileRead.from_orm(obj)
+    return FileRead.model_validate(obj)
 
 
 @router.get("/files/{file_id}", response_model=FileRead)
@@ -320,7 +539,7 @@ def get_file_meta(
     current_user: User = Depends(get_current_user),
 ):
     obj = _get_file_owned(db, current_user.id, file_id)
-    return FileRead.from_orm(obj)
+    return FileRead.model_validate(obj)
 
 
 @router.patch("/files/{file_id}", response_model=FileRead)
@@ -349,21 +568,22 @@ def update_file(
         db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="同一目录下已存在同名文件")
     db.refresh(obj)
-    return FileRead.from_orm(obj)
+    return FileRead.model_validate(obj)
 
 
 @router.delete("/files/{file_id}")
 def delete_file(
     file_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    _ensure_storage_root()
     obj = _get_file_owned(db, current_user.id, file_id)
-    abs_path = (Path(settings.storage_root) / obj.storage_path).resolve()
-    _safe_unlink(abs_path)
+    abs_path = _storage_abs_path(obj.storage_path)
     db.delete(obj)
     db.commit()
+    # disk cleanup runs after the response is sent
+    background_tasks.add_task(_safe_unlink, abs_path)
     return {"deleted": 1}
 
 
@@ -375,12 +595,19 @@ def download_file(
 ):
     obj = _get_file_owned(db, current_user.id, file_id)
 
-    abs_path = (Path(settings.storage_root) / obj.storage_path).resolve()
-    if not abs_path.exists():
+    abs_path = _storage_abs_path(obj.storage_path)
+    # one stat serves both the existence check and the response headers; FileResponse skips its own
+    # stat when given the result
+    try:
+        st = os.stat(abs_path)
+    except FileNotFoundError:
+        st = None
+    if st is None or not S_ISREG(st.st_mode):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文件内容不存在")
 
-    return FileResponse(
+    return _DownloadResponse(
         path=str(abs_path),
         media_type=obj.mime_type or "application/octet-stream",
         filename=obj.name,
+        stat_result=st,
     )
@@ -5,8 +5,16 @@ from sqlalchemy.orm import sessionmaker
 from config import settings
 
 
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(settings.database_url, connect_args=connect_args, future=True)
+if settings.database_url.startswith("sqlite"):
+    engine_args = {"connect_args": {"check_same_thread": False}}
+else:
+    # sized for FastAPI's threadpool (40 workers by default), which runs the sync handlers
+    engine_args = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+engine = create_engine(settings.database_url, query_cache_size=2048, future=True, **engine_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
 
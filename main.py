@@ -2,18 +2,21 @@ import logging
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from api import auth
 from api.chat.router import router as chat_router
+from api.files import router as fs_router
 from config import settings
 from database import init_db
 from utils.crypto import load_or_create_key_pair
+from utils.jwt import sha256_backend
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title=settings.app_name)
+app = FastAPI(title=settings.app_name, default_response_class=ORJSONResponse)
 
 allowed_origins = settings.cors_origins
 if isinstance(allowed_origins, str):
@@ -36,6 +39,9 @@ app.include_router(fs_router)
 def on_startup():
     init_db()
     load_or_create_key_pair(settings.rsa_private_key_path, settings.rsa_public_key_path)
+    settings.storage_root.mkdir(parents=True, exist_ok=True)
+    logger.info("bcrypt cost factor: %s", auth.init_bcrypt_rounds())
+    logger.info("JWT HMAC-SHA256 backend: %s", sha256_backend())
     logger.info("Episcience API initialized")
 
 
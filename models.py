@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -23,6 +23,8 @@ class Folder(Base):
     __tablename__ = "folders"
     __table_args__ = (
         UniqueConstraint("owner_id", "parent_id", "name", name="uq_folders_owner_parent_name"),
+        # children listing: WHERE owner_id=? AND parent_id=? ORDER BY created_at DESC
+        Index("ix_folders_owner_parent_created", "owner_id", "parent_id", "created_at"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -32,14 +34,16 @@ class Folder(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    owner = relationship("User", lazy="joined")
-    parent = relationship("Folder", remote_side=[id], lazy="joined")
+    owner = relationship("User", lazy="raise")
+    parent = relationship("Folder", remote_side=[id], lazy="raise")
 
 
 class FileObject(Base):
     __tablename__ = "files"
     __table_args__ = (
         UniqueConstraint("owner_id", "folder_id", "name", name="uq_files_owner_folder_name"),
+        # children listing: WHERE owner_id=? AND folder_id=? ORDER BY created_at DESC
+        Index("ix_files_owner_folder_created", "owner_id", "folder_id", "created_at"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -58,5 +62,5 @@ class FileObject(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    owner = relationship("User", lazy="joined")
-    folder = relationship("Folder", lazy="joined")
+    owner = relationship("User", lazy="raise")
+    folder = relationship("Folder", lazy="raise")
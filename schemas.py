@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter, validator
 
 
 class EncryptedPayload(BaseModel):
@@ -29,8 +29,7 @@ class UserBase(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserCreate(AuthPayload):
@@ -51,8 +50,7 @@ class UserRead(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TokenResponse(BaseModel):
@@ -100,8 +98,7 @@ class FolderRead(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class FileRead(BaseModel):
@@ -115,8 +112,12 @@ class FileRead(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Validate whole ORM result lists in one pass instead of one model_validate call per row.
+FolderListAdapter = TypeAdapter(list[FolderRead])
+FileListAdapter = TypeAdapter(list[FileRead])
 
 
 class FolderChildren(BaseModel):
@@ -1,10 +1,14 @@
 import base64
 import json
+import threading
 from pathlib import Path
 from typing import Tuple
 
+from cachetools import LRUCache
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.serialization import (
     BestAvailableEncryption,
     Encoding,
@@ -13,8 +17,42 @@ from cryptography.hazmat.primitives.serialization import (
     PublicFormat,
 )
 
+_PKCS1 = padding.PKCS1v15()
+# hash algorithm objects are stateless descriptors, safe to share between threads and paddings
+_SHA256 = hashes.SHA256()
+_OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=_SHA256), algorithm=_SHA256, label=None)
+_SCHEMES = (_PKCS1, _OAEP)
+_SCHEMES_BY_NAME = {"pkcs1": _PKCS1, "oaep": _OAEP}
+# index into _SCHEMES of the padding that last decrypted successfully
+_preferred_scheme = 0
+
+# (private_path, public_path, private key mtime_ns) -> loaded key pair, see load_or_create_key_pair
+_key_cache: dict[tuple[str, str, int], Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]] = {}
+_key_cache_lock = threading.Lock()
+
+# RSA-wrapped session key bytes -> unwrapped AES key, see decrypt_envelope
+_session_keys: LRUCache = LRUCache(maxsize=4096)
+_session_key_lock = threading.Lock()
+
 
 def load_or_create_key_pair(private_path: Path, public_path: Path, passphrase: str | None = None) -> Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
+    # memoized on the private key file's mtime, so a rotated key on disk is picked up on the next call
+    with _key_cache_lock:
+        try:
+            cache_key = (str(private_path), str(public_path), private_path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            cache_key = None
+        cached = _key_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return cached
+
+        pair = _load_or_create_key_pair(private_path, public_path, passphrase)
+        _key_cache.clear()  # drop pairs for a rotated key file
+        _key_cache[(str(private_path), str(public_path), private_path.stat().st_mtime_ns)] = pair
+        return pair
+
+
+def _load_or_create_key_pair(private_path: Path, public_path: Path, passphrase: str | None = None) -> Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
     private_key = None
     if private_path.exists():
         private_key = serialization.load_pem_private_key(
@@ -23,18 +61,18 @@ def load_or_create_key_pair(private_path: Path, public_path: Path, passphrase: s
         )
     else:
         private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-        _persist_keys(private_key, private_path, public_path, passphrase)
+        _write_private(private_key, private_path, passphrase)
+        _write_public(private_key.public_key(), public_path)
 
     public_key = private_key.public_key()
     if not public_path.exists():
-        _persist_keys(private_key, private_path, public_path, passphrase)
+        # only the public half is missing; re-encrypting the private key would be wasted work
+        _write_public(public_key, public_path)
     return private_key, public_key
 
 
-def _persist_keys(private_key: rsa.RSAPrivateKey, private_path: Path, public_path: Path, passphrase: str | None = None):
+def _write_private(private_key: rsa.RSAPrivateKey, private_path: Path, passphrase: str | None = None):
     private_path.parent.mkdir(parents=True, exist_ok=True)
-    public_path.parent.mkdir(parents=True, exist_ok=True)
-
     encryption = BestAvailableEncryption(passphrase.encode()) if passphrase else NoEncryption()
     private_bytes = private_key.private_bytes(
         encoding=Encoding.PEM,
@@ -43,28 +81,80 @@ def _persist_keys(private_key: rsa.RSAPrivateKey, private_path: Path, public_pat
     )
     private_path.write_bytes(private_bytes)
 
-    public_bytes = private_key.public_key().public_bytes(
+
+def _write_public(public_key: rsa.RSAPublicKey, public_path: Path):
+    public_path.parent.mkdir(parents=True, exist_ok=True)
+    public_bytes = public_key.public_bytes(
         encoding=Encoding.PEM,
         format=PublicFormat.SubjectPublicKeyInfo,
     )
     public_path.write_bytes(public_bytes)
 
 
+def decrypt_envelope(envelope: dict, private_key: rsa.RSAPrivateKey) -> dict:
+    """
+    Decrypts a hybrid payload {"k": b64(RSA-OAEP(aes_key)), "n": b64(12-byte nonce), "c": b64(AES-GCM ciphertext||tag)}.
+    Clients reuse one wrapped key per session with a fresh nonce per message, so the RSA unwrap runs
+    once per session and later messages only cost an AES-GCM decrypt.
+    """
+    try:
+        wrapped = base64.b64decode(envelope["k"])
+        nonce = base64.b64decode(envelope["n"])
+        ciphertext = base64.b64decode(envelope["c"])
+    except (KeyError, TypeError) as exc:
+        raise ValueError("Malformed payload envelope") from exc
+
+    with _session_key_lock:
+        key = _session_keys.get(wrapped)
+    cached = key is not None
+    if not cached:
+        key = private_key.decrypt(wrapped, _OAEP)
+
+    try:
+        plaintext = AESGCM(key).decrypt(nonce, ciphertext, None)
+    except InvalidTag as exc:
+        raise ValueError("Unable to decrypt payload") from exc
+
+    # only keys that authenticated a message are cached
+    if not cached:
+        with _session_key_lock:
+            _session_keys[wrapped] = key
+    return json.loads(plaintext.decode("utf-8"))
+
+
 def decrypt_payload(ciphertext_b64: str, private_key: rsa.RSAPrivateKey) -> dict:
     """
     Decrypts RSA payload. JSEncrypt uses PKCS1 v1.5 padding by default, so we try it first
-    and fall back to OAEP if needed.
+    and fall back to OAEP if needed. The scheme that last succeeded is tried first on the next call,
+    so OAEP clients don't pay for a failed PKCS1 attempt every time.
+    Payloads holding a JSON envelope (never valid base64, which has no "{") are dispatched directly:
+    {"s": "oaep"|"pkcs1", "c": b64} names its padding, anything else goes to decrypt_envelope.
     """
+    global _preferred_scheme
+    if ciphertext_b64.startswith("{"):
+        envelope = json.loads(ciphertext_b64)
+        if not isinstance(envelope, dict):
+            raise ValueError("Malformed payload envelope")
+        if "s" in envelope:
+            if not isinstance(envelope["s"], str):
+                raise ValueError("Malformed payload envelope")
+            scheme = _SCHEMES_BY_NAME.get(envelope["s"])
+            if scheme is None or not isinstance(envelope.get("c"), str):
+                raise ValueError("Malformed payload envelope")
+            decrypted_bytes = private_key.decrypt(base64.b64decode(envelope["c"]), scheme)
+            return json.loads(decrypted_bytes.decode("utf-8"))
+        return decrypt_envelope(envelope, private_key)
+
     decoded = base64.b64decode(ciphertext_b64)
-    for scheme in (
-        padding.PKCS1v15(),
-        padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None),
-    ):
+    first = _preferred_scheme
+    for idx in (first, 1 - first):
         try:
-            decrypted_bytes = private_key.decrypt(decoded, scheme)
-            return json.loads(decrypted_bytes.decode("utf-8"))
+            decrypted_bytes = private_key.decrypt(decoded, _SCHEMES[idx])
+            payload = json.loads(decrypted_bytes.decode("utf-8"))
         except ValueError:
             continue
+        _preferred_scheme = idx
+        return payload
     raise ValueError("Unable to decrypt payload")
 
 